@@ -19,20 +19,287 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <https://www.gnu.org/licenses/>.
 import abc
+import collections
 import copy
 import datetime
+import gzip
+import json
+import math
 import os.path
+import re
 import warnings
 import yaml
+import numpy as np
 from astropy.table import Table
 from astropy.io import fits
 
 from lsst.log import Log
 from lsst.daf.base import PropertyList
 
+try:
+    from yaml import CSafeLoader as _YamlLoader
+    from yaml import CSafeDumper as _YamlDumper
+except ImportError:
+    from yaml import SafeLoader as _YamlLoader
+    from yaml import SafeDumper as _YamlDumper
+
+
+class _CalibYamlLoader(_YamlLoader):
+    """Safe YAML loader for calibrations.
+
+    Constructors are registered on this subclass only, so the shared
+    PyYAML loaders are left untouched.
+    """
+
+
+class _CalibYamlDumper(_YamlDumper):
+    """Safe YAML dumper for calibrations.
+
+    Representers are registered on this subclass only, so the shared
+    PyYAML dumpers are left untouched.
+    """
+
+
+# The safe loaders and dumpers only understand the standard YAML tags.
+# Reuse the PropertyList constructor and representer that
+# lsst.daf.base registers with the defaults so that calibration
+# metadata can still be round-tripped.
+_PROPERTYLIST_TAG = "lsst.daf.base.PropertyList"
+if _PROPERTYLIST_TAG in yaml.Loader.yaml_constructors:
+    _CalibYamlLoader.add_constructor(_PROPERTYLIST_TAG, yaml.Loader.yaml_constructors[_PROPERTYLIST_TAG])
+if PropertyList in yaml.Dumper.yaml_representers:
+    _CalibYamlDumper.add_representer(PropertyList, yaml.Dumper.yaml_representers[PropertyList])
+
+
+def _constructLegacyOrderedDict(loader, node):
+    """Construct a `collections.OrderedDict` from its legacy YAML form.
+    """
+    items, = loader.construct_sequence(node, deep=True)
+    return collections.OrderedDict(items)
+
+
+def _constructLegacyDtype(loader, node):
+    """Construct a `numpy.dtype` from its legacy YAML form.
+    """
+    fields = loader.construct_mapping(node, deep=True)
+    dtype = np.dtype(*fields["args"])
+    if "state" in fields:
+        dtype.__setstate__(fields["state"])
+    return dtype
+
+
+def _constructLegacyScalar(loader, node):
+    """Construct a numpy scalar from its legacy YAML form.
+    """
+    dtype, data = loader.construct_sequence(node, deep=True)
+    return np.frombuffer(data, dtype=dtype)[0]
+
+
+# Files written with the default dumper, before the switch to the safe
+# dumper, use Python-specific tags for tuples (the crosstalk shape),
+# ordered dictionaries (metadata read from FITS or ECSV tables) and
+# numpy scalars (provenance dataIds read from tables).  Only these
+# types are reconstructed; any other Python tag is still rejected.
+_LEGACY_YAML_CONSTRUCTORS = {
+    "python/tuple": lambda loader, node: tuple(loader.construct_sequence(node)),
+    "python/object/apply:collections.OrderedDict": _constructLegacyOrderedDict,
+    "python/object/apply:numpy.dtype": _constructLegacyDtype,
+    "python/object/apply:numpy.core.multiarray.scalar": _constructLegacyScalar,
+    "python/object/apply:numpy._core.multiarray.scalar": _constructLegacyScalar,
+}
+for _tag, _constructor in _LEGACY_YAML_CONSTRUCTORS.items():
+    _CalibYamlLoader.add_constructor(f"tag:yaml.org,2002:{_tag}", _constructor)
+
+# numpy scalars and arrays are written as the equivalent Python objects.
+_CalibYamlDumper.add_multi_representer(np.generic,
+                                       lambda dumper, value: dumper.represent_data(value.item()))
+_CalibYamlDumper.add_multi_representer(np.ndarray,
+                                       lambda dumper, value: dumper.represent_data(value.tolist()))
+# Subclasses of the standard containers, such as the OrderedDict
+# metadata of tables read from FITS, are written as the base type.
+_CalibYamlDumper.add_multi_representer(dict, _CalibYamlDumper.represent_dict)
+_CalibYamlDumper.add_multi_representer(list, _CalibYamlDumper.represent_list)
+_CalibYamlDumper.add_multi_representer(tuple, _CalibYamlDumper.represent_list)
+
 
 __all__ = ["IsrCalib", "IsrProvenance"]
 
+_MODULE_LOG = Log.getLogger(__name__.partition(".")[2])
+
+
+_YAML_RESOLVER = yaml.resolver.Resolver()
+_YAML_PLAIN_STRING = re.compile(r"[A-Za-z_][A-Za-z0-9_./ -]*")
+# Characters that may not appear unescaped in a YAML double-quoted
+# scalar, either because they are not printable or because YAML treats
+# them as line breaks.
+_YAML_UNSAFE_CHARS = re.compile("[^\x09\x0A\x0D\x20-\x7E\xA0-\u2027\u202A-\uD7FF\uE000-\uFFFD"
+                                "\U00010000-\U0010FFFF]")
+
+
+def _formatYamlString(value):
+    """Format a string as a YAML scalar, quoting it only if required.
+    """
+    if (_YAML_PLAIN_STRING.fullmatch(value) and not value.endswith(" ")
+            and _YAML_RESOLVER.resolve(yaml.ScalarNode, value, (True, False)) == "tag:yaml.org,2002:str"):
+        return value
+    # JSON strings are valid YAML double-quoted scalars once the
+    # characters YAML does not accept verbatim are escaped.
+    return _YAML_UNSAFE_CHARS.sub(lambda match: f"\\u{ord(match.group()):04x}",
+                                  json.dumps(value, ensure_ascii=False))
+
+
+def _formatYamlFloat(value):
+    """Format a float as a YAML scalar that resolves back to a float.
+    """
+    if math.isnan(value):
+        return ".nan"
+    if math.isinf(value):
+        return ".inf" if value > 0 else "-.inf"
+    text = repr(value)
+    if "." not in text and "e" in text:
+        # YAML 1.1 requires a decimal point in exponential notation.
+        text = text.replace("e", ".0e", 1)
+    return text
+
+
+_YAML_SCALAR_FORMATTERS = {
+    str: _formatYamlString,
+    int: str,
+    float: _formatYamlFloat,
+    bool: lambda value: "true" if value else "false",
+    type(None): lambda value: "null",
+    datetime.datetime: datetime.datetime.isoformat,
+    datetime.date: datetime.date.isoformat,
+}
+_YAML_EMPTY_CONTAINERS = {dict: "{}", list: "[]", tuple: "[]"}
+
+
+def _writeYamlFallback(obj, stream, indent):
+    """Write an object of unknown type using the generic YAML dumper.
+    """
+    pad = " " * indent
+    for line in yaml.dump(obj, Dumper=_CalibYamlDumper, default_flow_style=False).splitlines():
+        # Plain scalars at the document root are terminated with an
+        # explicit document end marker, which cannot be nested.
+        if line != "...":
+            stream.write(f"{pad}{line}\n")
+
+
+def _writeYamlValue(obj, stream, indent):
+    """Write the value following a mapping key or sequence indicator.
+    """
+    formatter = _YAML_SCALAR_FORMATTERS.get(type(obj))
+    if formatter is None and isinstance(obj, (np.generic, np.ndarray)):
+        obj = obj.tolist()
+        formatter = _YAML_SCALAR_FORMATTERS.get(type(obj))
+
+    if formatter is not None:
+        stream.write(f" {formatter(obj)}\n")
+        return
+
+    containerType = _yamlContainerType(obj)
+    if containerType is not None and not obj:
+        stream.write(f" {_YAML_EMPTY_CONTAINERS[containerType]}\n")
+    else:
+        stream.write("\n")
+        _fastYamlDump(obj, stream, indent + 2)
+
+
+def _writeYamlDict(obj, stream, indent):
+    """Write a dictionary as a YAML block mapping.
+    """
+    if not all(type(key) in _YAML_SCALAR_FORMATTERS for key in obj):
+        _writeYamlFallback(obj, stream, indent)
+        return
+
+    pad = " " * indent
+    for key, value in obj.items():
+        stream.write(f"{pad}{_YAML_SCALAR_FORMATTERS[type(key)](key)}:")
+        _writeYamlValue(value, stream, indent)
+
+
+def _writeYamlList(obj, stream, indent):
+    """Write a list or tuple as a YAML block sequence.
+    """
+    pad = " " * indent
+    for value in obj:
+        stream.write(f"{pad}-")
+        _writeYamlValue(value, stream, indent)
+
+
+_YAML_CONTAINER_WRITERS = {dict: _writeYamlDict, list: _writeYamlList, tuple: _writeYamlList}
+
+
+def _yamlContainerType(obj):
+    """Return the container type an object is written as, or `None`.
+
+    Subclasses of the standard containers, such as the
+    `collections.OrderedDict` metadata of tables read from FITS, are
+    written as their base type.
+    """
+    objType = type(obj)
+    if objType in _YAML_CONTAINER_WRITERS:
+        return objType
+    for containerType in _YAML_CONTAINER_WRITERS:
+        if isinstance(obj, containerType):
+            return containerType
+    return None
+
+
+def _fastYamlDump(obj, stream, indent=0):
+    """Write an object to a stream as block-style YAML.
+
+    Only the types used by calibration dictionaries (dictionaries,
+    lists, tuples, strings, numbers, booleans, `None` and dates) are
+    handled directly, with numpy scalars and arrays converted to the
+    equivalent Python objects first.  Anything else is passed to
+    `yaml.dump`, so the output can always be read back with a safe
+    loader that knows the same tags as ``_CalibYamlDumper``.
+
+    Parameters
+    ----------
+    obj : `object`
+        Object to write.
+    stream : file-like
+        Text stream to write to.
+    indent : `int`, optional
+        Number of spaces to indent the output by.
+    """
+    if isinstance(obj, (np.generic, np.ndarray)):
+        obj = obj.tolist()
+    containerType = _yamlContainerType(obj)
+    formatter = _YAML_SCALAR_FORMATTERS.get(type(obj))
+    if containerType is not None and obj:
+        _YAML_CONTAINER_WRITERS[containerType](obj, stream, indent)
+    elif formatter is not None:
+        stream.write(f"{' ' * indent}{formatter(obj)}\n")
+    else:
+        _writeYamlFallback(obj, stream, indent)
+
+
+def _splitTextFilename(filename):
+    """Split a text calibration filename into its root and extension.
+
+    Parameters
+    ----------
+    filename : `str`
+        Filename to split.
+
+    Returns
+    -------
+    path : `str`
+        Filename with the extension (and any ".gz" suffix) removed.
+    ext : `str`
+        Lower-cased extension, including the leading period.
+    compressed : `bool`
+        True if the filename has a ".gz" suffix.
+    """
+    path, ext = os.path.splitext(filename)
+    compressed = ext.lower() == ".gz"
+    if compressed:
+        path, ext = os.path.splitext(path)
+    return path, ext.lower(), compressed
+
 
 class IsrCalib(abc.ABC):
     """Generic calibration type.
@@ -63,17 +330,25 @@ class IsrCalib(abc.ABC):
     _OBSTYPE = 'generic'
     _SCHEMA = 'NO SCHEMA'
     _VERSION = 0
+    _SCHEMA_KEY = f"{_OBSTYPE}_SCHEMA"
+    _VERSION_KEY = f"{_OBSTYPE}_VERSION"
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        # Keep the metadata keys in step with the subclass obs type.
+        cls._SCHEMA_KEY = f"{cls._OBSTYPE}_SCHEMA"
+        cls._VERSION_KEY = f"{cls._OBSTYPE}_VERSION"
 
     def __init__(self, detectorName=None, detectorSerial=None, detector=None, log=None, **kwargs):
         self._detectorName = detectorName
         self._detectorSerial = detectorSerial
-        self.setMetadata(PropertyList())
+        self.setMetadata(PropertyList(), takeOwnership=True)
 
         # Define the required attributes for this calibration.
         self.requiredAttributes = set(['_OBSTYPE', '_SCHEMA', '_VERSION'])
         self.requiredAttributes.update(['_detectorName', '_detectorSerial', '_metadata'])
 
-        self.log = log if log else Log.getLogger(__name__.partition(".")[2])
+        self.log = log if log else _MODULE_LOG
 
         if detector:
             self.fromDetector(detector)
@@ -90,6 +365,8 @@ class IsrCalib(abc.ABC):
         """
         if not isinstance(other, self.__class__):
             return False
+        if self is other:
+            return True
 
         for attr in self._requiredAttributes:
             if getattr(self, attr) != getattr(other, attr):
@@ -118,22 +395,27 @@ class IsrCalib(abc.ABC):
         """
         return self._metadata
 
-    def setMetadata(self, metadata):
+    def setMetadata(self, metadata, takeOwnership=False):
         """Store a copy of the supplied metadata with this calibration.
 
         Parameters
         ----------
         metadata : `lsst.daf.base.PropertyList`
             Metadata to associate with the calibration.  Will be copied and
-            overwrite existing metadata.
+            overwrite existing metadata.  If `None`, the existing metadata
+            is left unchanged.
+        takeOwnership : `bool`, optional
+            If True, store ``metadata`` directly instead of a copy.  Only
+            use this if the caller will not modify ``metadata`` afterwards.
         """
-        if metadata is not None:
-            self._metadata = copy.copy(metadata)
+        if metadata is None:
+            return
+        self._metadata = metadata if takeOwnership else copy.copy(metadata)
 
         # Ensure that we have the obs type required by calibration ingest
         self._metadata["OBSTYPE"] = self._OBSTYPE
-        self._metadata[self._OBSTYPE + "_SCHEMA"] = self._SCHEMA
-        self._metadata[self._OBSTYPE + "_VERSION"] = self._VERSION
+        self._metadata[self._SCHEMA_KEY] = self._SCHEMA
+        self._metadata[self._VERSION_KEY] = self._VERSION
 
     def updateMetadata(self, setDate=False, **kwargs):
         """Update metadata keywords with new values.
@@ -146,10 +428,8 @@ class IsrCalib(abc.ABC):
             Set of key=value pairs to assign to the metadata.
         """
         mdOriginal = self.getMetadata()
-        mdSupplemental = dict()
-
-        self._metadata["DETECTOR"] = self._detectorName
-        self._metadata["DETECTOR_SERIAL"] = self._detectorSerial
+        mdSupplemental = {"DETECTOR": self._detectorName,
+                          "DETECTOR_SERIAL": self._detectorSerial}
 
         if setDate:
             date = datetime.datetime.now()
@@ -177,15 +457,18 @@ class IsrCalib(abc.ABC):
         Raises
         ------
         RuntimeError :
-            Raised if the filename does not end in ".ecsv" or ".yaml".
+            Raised if the filename does not end in ".ecsv" or ".yaml",
+            optionally followed by ".gz".
         """
-        if filename.endswith((".ecsv", ".ECSV")):
+        path, ext, compressed = _splitTextFilename(filename)
+        if ext == ".ecsv":
+            # astropy decompresses gzipped files transparently.
             data = Table.read(filename, format='ascii.ecsv')
             return cls.fromTable([data])
-
-        elif filename.endswith((".yaml", ".YAML")):
-            with open(filename, 'r') as f:
-                data = yaml.load(f, Loader=yaml.CLoader)
+        elif ext == ".yaml":
+            opener = gzip.open if compressed else open
+            with opener(filename, 'rt') as f:
+                data = yaml.load(f, Loader=_CalibYamlLoader)
             return cls.fromDict(data)
         else:
             raise RuntimeError(f"Unknown filename extension: {filename}")
@@ -217,16 +500,19 @@ class IsrCalib(abc.ABC):
         Notes
         -----
         The file is written to YAML/ECSV format and will include any
-        associated metadata.
+        associated metadata.  If the filename ends in ".gz", the file
+        is gzip compressed.
 
         """
-        if format == 'yaml' or (format == 'auto' and filename.lower().endswith((".yaml", ".YAML"))):
+        path, ext, compressed = _splitTextFilename(filename)
+        suffix = ".gz" if compressed else ""
+        if format == 'yaml' or (format == 'auto' and ext == ".yaml"):
             outDict = self.toDict()
-            path, ext = os.path.splitext(filename)
-            filename = path + ".yaml"
-            with open(filename, 'w') as f:
-                yaml.dump(outDict, f)
-        elif format == 'ecsv' or (format == 'auto' and filename.lower().endswith((".ecsv", ".ECSV"))):
+            filename = path + ".yaml" + suffix
+            opener = gzip.open if compressed else open
+            with opener(filename, 'wt') as f:
+                _fastYamlDump(outDict, f)
+        elif format == 'ecsv' or (format == 'auto' and ext == ".ecsv"):
             tableList = self.toTable()
             if len(tableList) > 1:
                 # ECSV doesn't support multiple tables per file, so we
@@ -234,9 +520,12 @@ class IsrCalib(abc.ABC):
                 raise RuntimeError(f"Unable to persist {len(tableList)}tables in ECSV format.")
 
             table = tableList[0]
-            path, ext = os.path.splitext(filename)
-            filename = path + ".ecsv"
-            table.write(filename, format="ascii.ecsv")
+            filename = path + ".ecsv" + suffix
+            if compressed:
+                with gzip.open(filename, 'wt') as f:
+                    table.write(f, format="ascii.ecsv")
+            else:
+                table.write(filename, format="ascii.ecsv")
         else:
             raise RuntimeError(f"Attempt to write to a file {filename} "
                                "that does not end in '.yaml' or '.ecsv'")
@@ -257,16 +546,10 @@ class IsrCalib(abc.ABC):
         calib : `lsst.ip.isr.IsrCalib`
             Calibration contained within the file.
         """
-        tableList = []
-        tableList.append(Table.read(filename, hdu=1))
-        extNum = 2  # Fits indices start at 1, we've read one already.
-        try:
-            with warnings.catch_warnings("error"):
-                newTable = Table.read(filename, hdu=extNum)
-                tableList.append(newTable)
-                extNum += 1
-        except Exception:
-            pass
+        # Open the file once, rather than once per extension, and only
+        # read the headers and data of the extensions we use.
+        with fits.open(filename, memmap=True, lazy_load_hdus=True) as hdulist:
+            tableList = [Table.read(hdu) for hdu in hdulist if isinstance(hdu, fits.BinTableHDU)]
 
         return cls.fromTable(tableList)
 
@@ -489,13 +772,11 @@ class IsrProvenance(IsrCalib):
 
         Parameters
         ----------
-        dataIdList : `list` [`lsst.daf.butler.DataId`]
-            List of dataIds used in generating this calibration.
+        dataIdList : `iterable` [`lsst.daf.butler.DataId`]
+            DataIds used in generating this calibration.
         """
         for dataId in dataIdList:
-            for key in dataId:
-                if key not in self.dimensions:
-                    self.dimensions.add(key)
+            self.dimensions.update(dataId)
             self.dataIdList.append(dataId)
 
     @classmethod
@@ -520,20 +801,16 @@ class IsrProvenance(IsrCalib):
         inDict['detectorSerial'] = metadata['DETECTOR_SERIAL']
         inDict['instrument'] = metadata['INSTRUME']
         inDict['calibType'] = metadata['calibType']
-        inDict['dimensions'] = set()
-        inDict['dataIdList'] = list()
 
         schema = dict()
         for colName in table.columns:
             schema[colName.lower()] = colName
-            inDict['dimensions'].add(colName.lower())
-        inDict['dimensions'] = sorted(inDict['dimensions'])
+        dims = sorted(schema)
+        inDict['dimensions'] = dims
 
-        for row in table:
-            entry = dict()
-            for dim in sorted(inDict['dimensions']):
-                entry[dim] = row[schema[dim]]
-            inDict['dataIdList'].append(entry)
+        # Extract whole columns once rather than indexing every row.
+        columns = [table[schema[dim]].tolist() for dim in dims]
+        inDict['dataIdList'] = [dict(zip(dims, values)) for values in zip(*columns)]
 
         return cls.fromDict(inDict)
 
@@ -600,8 +877,11 @@ class IsrProvenance(IsrCalib):
         """
         tableList = []
         self.updateMetadata(setDate=True)
-        catalog = Table(rows=self.dataIdList,
-                        names=self.dimensions)
+        # Build the table column by column; adding rows one at a time
+        # is much slower for long dataId lists.
+        dims = list(self.dimensions)
+        columns = {dim: [dataId[dim] for dataId in self.dataIdList] for dim in dims}
+        catalog = Table(columns, names=dims)
         catalog.meta = self.getMetadata().toDict()
         tableList.append(catalog)
         return tableList
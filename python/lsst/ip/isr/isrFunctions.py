@@ -88,11 +88,15 @@ def interpolateDefectList(maskedImage, defectList, fwhm, fallbackValue=None):
         Fallback value if an interpolated value cannot be determined.
         If None, then the clipped mean of the image is used.
     """
+    if 'INTRP' not in maskedImage.getMask().getMaskPlaneDict():
+        maskedImage.getMask().addMaskPlane('INTRP')
+    if len(defectList) == 0:
+        # Nothing to interpolate, so don't pay for the clipped mean.
+        return maskedImage
+
     psf = createPsf(fwhm)
     if fallbackValue is None:
         fallbackValue = afwMath.makeStatistics(maskedImage.getImage(), afwMath.MEANCLIP).getValue()
-    if 'INTRP' not in maskedImage.getMask().getMaskPlaneDict():
-        maskedImage.getMask().addMaskPlane('INTRP')
     measAlg.interpolateOverDefects(maskedImage, psf, defectList, fallbackValue, True)
     return maskedImage
 
@@ -116,13 +120,18 @@ def makeThresholdMask(maskedImage, threshold, growFootprints=1, maskName='SAT'):
     defectList : `lsst.meas.algorithms.Defects`
         Defect list constructed from pixels above the threshold.
     """
+    if maskedImage.getImage().getArray().max() < threshold:
+        # No pixel can reach the threshold; skip detection entirely.
+        return measAlg.Defects()
+
     # find saturated regions
     thresh = afwDetection.Threshold(threshold)
     fs = afwDetection.FootprintSet(maskedImage, thresh)
 
-    if growFootprints > 0:
-        fs = afwDetection.FootprintSet(fs, rGrow=growFootprints, isotropic=False)
     fpList = fs.getFootprints()
+    if growFootprints > 0 and len(fpList) > 0:
+        fs = afwDetection.FootprintSet(fs, rGrow=growFootprints, isotropic=False)
+        fpList = fs.getFootprints()
 
     # set mask
     mask = maskedImage.getMask()
@@ -147,7 +156,10 @@ def growMasks(mask, radius=0, maskNameList=['BAD'], maskValue="BAD"):
         Mask plane to assign the newly masked pixels to.
     """
     if radius > 0:
-        thresh = afwDetection.Threshold(mask.getPlaneBitMask(maskNameList), afwDetection.Threshold.BITMASK)
+        bitmask = mask.getPlaneBitMask(maskNameList)
+        if not numpy.any(mask.getArray() & bitmask):
+            return
+        thresh = afwDetection.Threshold(bitmask, afwDetection.Threshold.BITMASK)
         fpSet = afwDetection.FootprintSet(mask, thresh)
         fpSet = afwDetection.FootprintSet(fpSet, rGrow=radius, isotropic=False)
         fpSet.setMask(mask, maskValue)
@@ -177,9 +189,14 @@ def interpolateFromMask(maskedImage, fwhm, growSaturatedFootprints=1,
         # to expand the original mask bit to the full area to explain why we interpolated there.
         growMasks(mask, radius=growSaturatedFootprints, maskNameList=['SAT'], maskValue="SAT")
 
-    thresh = afwDetection.Threshold(mask.getPlaneBitMask(maskNameList), afwDetection.Threshold.BITMASK)
-    fpSet = afwDetection.FootprintSet(mask, thresh)
-    defectList = measAlg.Defects.fromFootprintList(fpSet.getFootprints())
+    bitmask = mask.getPlaneBitMask(maskNameList)
+    if numpy.any(mask.getArray() & bitmask):
+        thresh = afwDetection.Threshold(bitmask, afwDetection.Threshold.BITMASK)
+        fpSet = afwDetection.FootprintSet(mask, thresh)
+        defectList = measAlg.Defects.fromFootprintList(fpSet.getFootprints())
+    else:
+        # Nothing is masked, so skip the footprint detection entirely.
+        defectList = measAlg.Defects()
 
     interpolateDefectList(maskedImage, defectList, fwhm, fallbackValue=fallbackValue)
 
@@ -351,10 +368,44 @@ def updateVariance(maskedImage, gain, readNoise):
     readNoise : scalar
         The amplifier read nmoise in ADU/pixel.
     """
-    var = maskedImage.getVariance()
-    var[:] = maskedImage.getImage()
-    var /= gain
-    var += readNoise**2
+    varArray = maskedImage.getVariance().getArray()
+    numpy.divide(maskedImage.getImage().getArray(), gain, out=varArray)
+    varArray += readNoise**2
+
+
+def measureFlatScale(flatMaskedImage, scalingType, userScale=1.0):
+    """Measure the scale used to normalize a flat.
+
+    Parameters
+    ----------
+    flatMaskedImage : `lsst.afw.image.MaskedImage`
+        Flat image to measure.
+    scalingType : str
+        Flat scale computation method.  Allowed values are 'MEAN',
+        'MEDIAN', or 'USER'.
+    userScale : scalar, optional
+        Scale to use if ``scalingType``='USER'.
+
+    Returns
+    -------
+    flatScale : `float`
+        Scale of the flat.
+
+    Raises
+    ------
+    RuntimeError
+        Raised if ``scalingType`` is not an allowed value.
+    """
+    # Figure out scale from the data
+    # Ideally the flats are normalized by the calibration product pipeline, but this allows some flexibility
+    # in the case that the flat is created by some other mechanism.
+    if scalingType in ('MEAN', 'MEDIAN'):
+        scalingType = afwMath.stringToStatisticsProperty(scalingType)
+        return afwMath.makeStatistics(flatMaskedImage.image, scalingType).getValue()
+    elif scalingType == 'USER':
+        return userScale
+    else:
+        raise RuntimeError('%s : %s not implemented' % ("measureFlatScale", scalingType))
 
 
 def flatCorrection(maskedImage, flatMaskedImage, scalingType, userScale=1.0, invert=False, trimToFit=False):
@@ -390,16 +441,7 @@ def flatCorrection(maskedImage, flatMaskedImage, scalingType, userScale=1.0, inv
         raise RuntimeError("maskedImage bbox %s != flatMaskedImage bbox %s" %
                            (maskedImage.getBBox(afwImage.LOCAL), flatMaskedImage.getBBox(afwImage.LOCAL)))
 
-    # Figure out scale from the data
-    # Ideally the flats are normalized by the calibration product pipeline, but this allows some flexibility
-    # in the case that the flat is created by some other mechanism.
-    if scalingType in ('MEAN', 'MEDIAN'):
-        scalingType = afwMath.stringToStatisticsProperty(scalingType)
-        flatScale = afwMath.makeStatistics(flatMaskedImage.image, scalingType).getValue()
-    elif scalingType == 'USER':
-        flatScale = userScale
-    else:
-        raise RuntimeError('%s : %s not implemented' % ("flatCorrection", scalingType))
+    flatScale = measureFlatScale(flatMaskedImage, scalingType, userScale=userScale)
 
     if not invert:
         maskedImage.scaledDivides(1.0/flatScale, flatMaskedImage)
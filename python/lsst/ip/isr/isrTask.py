@@ -1311,6 +1311,10 @@ class IsrTask(pipeBase.PipelineTask, pipeBase.CmdLineTask):
                 and illumMaskedImage is None):
             raise RuntimeError("Must supply an illumcor if config.doIlluminationCorrection=True.")
 
+        # The flat may be applied and removed several times below;
+        # measure its scale only once.
+        flatScale = self.measureFlatScale(flat) if self.config.doFlat else None
+
         # Begin ISR processing.
         if self.config.doConvertIntToFloat:
             self.log.info("Converting exposure to floating point values.")
@@ -1443,7 +1447,7 @@ class IsrTask(pipeBase.PipelineTask, pipeBase.CmdLineTask):
             # images so we can apply only the BF-correction and roll back the
             # interpolation.
             interpExp = ccdExposure.clone()
-            with self.flatContext(interpExp, flat, dark):
+            with self.flatContext(interpExp, flat, dark, flatScale=flatScale):
                 isrFunctions.interpolateFromMask(
                     maskedImage=interpExp.getMaskedImage(),
                     fwhm=self.config.fwhm,
@@ -1507,7 +1511,7 @@ class IsrTask(pipeBase.PipelineTask, pipeBase.CmdLineTask):
 
         if self.config.doFlat:
             self.log.info("Applying flat correction.")
-            self.flatCorrection(ccdExposure, flat)
+            self.flatCorrection(ccdExposure, flat, flatScale=flatScale)
             self.debugView(ccdExposure, "doFlat")
 
         if self.config.doApplyGains:
@@ -2101,7 +2105,28 @@ class IsrTask(pipeBase.PipelineTask, pipeBase.CmdLineTask):
         return self.config.doLinearize and \
             detector.getAmplifiers()[0].getLinearityType() != NullLinearityType
 
-    def flatCorrection(self, exposure, flatExposure, invert=False):
+    def measureFlatScale(self, flatExposure):
+        """Measure the scale used to normalize a flat.
+
+        Parameters
+        ----------
+        flatExposure : `lsst.afw.image.Exposure`
+            Flat exposure to measure.
+
+        Returns
+        -------
+        flatScale : `float`
+            The mean or median of the flat for ``flatScalingType`` 'MEAN'
+            or 'MEDIAN', or ``flatUserScale`` for 'USER'.
+
+        See Also
+        --------
+        lsst.ip.isr.isrFunctions.measureFlatScale
+        """
+        return isrFunctions.measureFlatScale(flatExposure.getMaskedImage(), self.config.flatScalingType,
+                                             userScale=self.config.flatUserScale)
+
+    def flatCorrection(self, exposure, flatExposure, invert=False, flatScale=None):
         """!Apply flat correction in place.
 
         Parameters
@@ -2112,16 +2137,25 @@ class IsrTask(pipeBase.PipelineTask, pipeBase.CmdLineTask):
             Flat exposure of the same size as ``exposure``.
         invert : `Bool`, optional
             If True, unflatten an already flattened image.
+        flatScale : `float`, optional
+            Scale of ``flatExposure``, as returned by `measureFlatScale`.
+            If None, the scale is determined from the configuration.
 
         See Also
         --------
         lsst.ip.isr.isrFunctions.flatCorrection
         """
+        scalingType = self.config.flatScalingType
+        userScale = self.config.flatUserScale
+        if flatScale is not None:
+            scalingType = 'USER'
+            userScale = flatScale
+
         isrFunctions.flatCorrection(
             maskedImage=exposure.getMaskedImage(),
             flatMaskedImage=flatExposure.getMaskedImage(),
-            scalingType=self.config.flatScalingType,
-            userScale=self.config.flatUserScale,
+            scalingType=scalingType,
+            userScale=userScale,
             invert=invert,
             trimToFit=self.config.doTrimToMatchCalib
         )
@@ -2441,7 +2475,7 @@ class IsrTask(pipeBase.PipelineTask, pipeBase.CmdLineTask):
         ccdExposure.getInfo().setValidPolygon(validPolygon)
 
     @contextmanager
-    def flatContext(self, exp, flat, dark=None):
+    def flatContext(self, exp, flat, dark=None, flatScale=None):
         """Context manager that applies and removes flats and darks,
         if the task is configured to apply them.
 
@@ -2453,6 +2487,9 @@ class IsrTask(pipeBase.PipelineTask, pipeBase.CmdLineTask):
             Flat exposure the same size as ``exp``.
         dark : `lsst.afw.image.Exposure`, optional
             Dark exposure the same size as ``exp``.
+        flatScale : `float`, optional
+            Scale of ``flat``, as returned by `measureFlatScale`.  If
+            None, the scale is determined from the configuration.
 
         Yields
         ------
@@ -2462,12 +2499,12 @@ class IsrTask(pipeBase.PipelineTask, pipeBase.CmdLineTask):
         if self.config.doDark and dark is not None:
             self.darkCorrection(exp, dark)
         if self.config.doFlat:
-            self.flatCorrection(exp, flat)
+            self.flatCorrection(exp, flat, flatScale=flatScale)
         try:
             yield exp
         finally:
             if self.config.doFlat:
-                self.flatCorrection(exp, flat, invert=True)
+                self.flatCorrection(exp, flat, invert=True, flatScale=flatScale)
             if self.config.doDark and dark is not None:
                 self.darkCorrection(exp, dark, invert=True)
 
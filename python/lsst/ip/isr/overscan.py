@@ -27,6 +27,14 @@ import lsst.pex.config as pexConfig
 
 __all__ = ["OverscanCorrectionTaskConfig", "OverscanCorrectionTask"]
 
+# Fit and evaluation functions for the polynomial vector overscan types.
+_POLYNOMIAL_FITTERS = {
+    'POLY': (np.polynomial.polynomial.polyfit, np.polynomial.polynomial.polyval),
+    'CHEB': (np.polynomial.chebyshev.chebfit, np.polynomial.chebyshev.chebval),
+    'LEG': (np.polynomial.legendre.legfit, np.polynomial.legendre.legval),
+}
+_SPLINE_TYPES = ('NATURAL_SPLINE', 'CUBIC_SPLINE', 'AKIMA_SPLINE')
+
 
 class OverscanCorrectionTaskConfig(pexConfig.Config):
     """Overscan correction options.
@@ -228,13 +236,22 @@ class OverscanCorrectionTask(pipeBase.Task):
             - ``maskArray``: Placeholder for a mask array (`list`)
             - ``isTransposed``: Orientation of the overscan (`bool`)
         """
-        if self.config.fitType == 'MEDIAN':
-            calcImage = self.integerConvert(image)
+        if self.config.fitType == 'MEAN':
+            # A plain mean needs no sorting or clipping, so reduce the
+            # pixel array directly.  Masked and NaN pixels are excluded
+            # to match the statistics control.
+            calcArray = self.getImageArray(image)
+            calcArray = np.ma.masked_where(np.isnan(np.ma.getdata(calcArray)), calcArray)
+            overscanValue = calcArray.mean(dtype=np.float64)
+            overscanValue = np.nan if overscanValue is np.ma.masked else float(overscanValue)
         else:
-            calcImage = image
+            if self.config.fitType == 'MEDIAN':
+                calcImage = self.integerConvert(image)
+            else:
+                calcImage = image
 
-        fitType = afwMath.stringToStatisticsProperty(self.config.fitType)
-        overscanValue = afwMath.makeStatistics(calcImage, fitType, self.statControl).getValue()
+            fitType = afwMath.stringToStatisticsProperty(self.config.fitType)
+            overscanValue = afwMath.makeStatistics(calcImage, fitType, self.statControl).getValue()
 
         return pipeBase.Struct(overscanValue=overscanValue,
                                maskArray=None,
@@ -415,14 +432,14 @@ class OverscanCorrectionTask(pipeBase.Task):
         maskArray = np.full_like(collapsed, False, dtype=bool)
         if np.ma.is_masked(collapsed):
             num = len(collapsed)
-            for low in range(num):
-                if not collapsed.mask[low]:
-                    break
+            good = ~np.ma.getmaskarray(collapsed)
+            if good.any():
+                low = np.argmax(good)
+                high = min(np.argmax(good[::-1]) + 1, num - 1)
+            else:
+                low = high = num - 1
             if low > 0:
                 maskArray[:low] = True
-            for high in range(1, num):
-                if not collapsed.mask[-high]:
-                    break
             if high > 1:
                 maskArray[-high:] = True
         return maskArray
@@ -463,15 +480,10 @@ class OverscanCorrectionTask(pipeBase.Task):
             num = len(collapsed)
             indices = 2.0*np.arange(num)/float(num) - 1.0
 
-            poly = np.polynomial
-            fitter, evaler = {
-                'POLY': (poly.polynomial.polyfit, poly.polynomial.polyval),
-                'CHEB': (poly.chebyshev.chebfit, poly.chebyshev.chebval),
-                'LEG': (poly.legendre.legfit, poly.legendre.legval),
-                'NATURAL_SPLINE': (self.splineFit, self.splineEval),
-                'CUBIC_SPLINE': (self.splineFit, self.splineEval),
-                'AKIMA_SPLINE': (self.splineFit, self.splineEval)
-            }[self.config.fitType]
+            if self.config.fitType in _SPLINE_TYPES:
+                fitter, evaler = self.splineFit, self.splineEval
+            else:
+                fitter, evaler = _POLYNOMIAL_FITTERS[self.config.fitType]
 
             coeffs = fitter(indices, collapsed, self.config.order)
             overscanVector = evaler(indices, coeffs)
@@ -18,12 +18,19 @@
 #
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <https://www.gnu.org/licenses/>.
+import collections
+import datetime
+import io
 import unittest
 import tempfile
+import yaml
+import numpy as np
+from astropy.io import fits
 
 import lsst.utils.tests
 
 from lsst.ip.isr import IsrProvenance
+from lsst.ip.isr.calibType import _fastYamlDump
 
 
 class IsrCalibCases(lsst.utils.tests.TestCase):
@@ -48,6 +55,8 @@ class IsrCalibCases(lsst.utils.tests.TestCase):
     def test_Text(self):
         self.runText('.yaml')
         self.runText('.ecsv')
+        self.runText('.yaml.gz')
+        self.runText('.ecsv.gz')
 
     def test_Fits(self):
         filename = tempfile.mktemp()
@@ -58,6 +67,117 @@ class IsrCalibCases(lsst.utils.tests.TestCase):
         fromFits.updateMetadata(setDate=True)
         self.assertNotEqual(self.calib, fromFits)
 
+    def test_equalityAfterAttributeSwap(self):
+        """Test that equality follows in-place changes to the attributes.
+        """
+        other = IsrProvenance(detectorName='test_calibType Det00',
+                              detectorSerial='Det00',
+                              calibType="Test Calib")
+        other.updateMetadata()
+        other.fromDataIds(self.calib.dataIdList)
+        self.assertEqual(self.calib, other)
+
+        # Replace one attribute with another, keeping the set size.
+        self.calib.requiredAttributes.discard('calibType')
+        self.calib.requiredAttributes.add('extra')
+        self.calib.extra = 1
+        other.extra = 2
+        self.assertNotEqual(self.calib, other)
+
+    def test_fromDataIdsGenerator(self):
+        """Test that provenance can be filled from a generator.
+        """
+        other = IsrProvenance(detectorName='test_calibType Det00',
+                              detectorSerial='Det00',
+                              calibType="Test Calib")
+        other.fromDataIds(dataId for dataId in self.calib.dataIdList)
+        self.assertEqual(other.dataIdList, self.calib.dataIdList)
+        self.assertEqual(other.dimensions, self.calib.dimensions)
+
+    def test_FitsHeader(self):
+        """Test the provenance FITS header, including unwritable values.
+        """
+        self.calib.getMetadata()['NONASCII'] = 'caf\u00e9'
+        filename = tempfile.mktemp()
+        usedFilename = self.calib.writeFits(filename + '.fits')
+
+        with fits.open(usedFilename) as hdulist:
+            header = hdulist[1].header
+            self.assertEqual(header['INSTRUME'], self.calib.instrument)
+            self.assertEqual(header['DETECTOR'], 'test_calibType Det00')
+            self.assertEqual(header['OBSTYPE'], self.calib._OBSTYPE)
+            self.assertNotIn('NONASCII', header)
+            self.assertEqual(hdulist[1].data.shape, (len(self.calib.dataIdList), ))
+
+        fromFits = IsrProvenance.readFits(usedFilename)
+        self.assertEqual(fromFits.dataIdList, self.calib.dataIdList)
+
+    def test_fastYamlDump(self):
+        """Test that the YAML writer round-trips through a safe loader.
+        """
+        data = {'instrument': 'testCam',
+                'dimensions': ['detector', 'exposure'],
+                'quoted': ['yes', '1', '', ' padded', 'a: b', '#comment', 'null', 'line\nbreak'],
+                'numbers': [0, -3, 2.5, 1e16, 1e-5, float('inf'), True, False, None],
+                'empty': {'dict': {}, 'list': []},
+                'dataIdList': [{'exposure': 1234, 'detector': 0},
+                               {'exposure': 1235, 'detector': [1, [2, 3]]}],
+                'date': datetime.datetime(2020, 1, 2, 3, 4, 5, 678),
+                7: 'integer key'}
+        stream = io.StringIO()
+        _fastYamlDump(data, stream)
+        self.assertEqual(yaml.safe_load(stream.getvalue()), data)
+
+        stream = io.StringIO()
+        _fastYamlDump((1, 2), stream)
+        self.assertEqual(yaml.safe_load(stream.getvalue()), [1, 2])
+
+        stream = io.StringIO()
+        _fastYamlDump({'scalar': np.float64(1.5), 'array': np.arange(4).reshape(2, 2),
+                       np.str_('key'): np.int32(3)}, stream)
+        self.assertEqual(yaml.safe_load(stream.getvalue()),
+                         {'scalar': 1.5, 'array': [[0, 1], [2, 3]], 'key': 3})
+
+        # Container subclasses are written as the base type.
+        stream = io.StringIO()
+        _fastYamlDump({'metadata': collections.OrderedDict([('B', 1), ('A', collections.OrderedDict())]),
+                       'keys': {np.str_('key'): collections.OrderedDict([('C', 2)])}}, stream)
+        self.assertEqual(yaml.safe_load(stream.getvalue()),
+                         {'metadata': {'B': 1, 'A': {}}, 'keys': {'key': {'C': 2}}})
+
+    def test_readLegacyYaml(self):
+        """Test reading YAML written with the default PyYAML dumper.
+        """
+        # Provenance dataIds read from tables used to be numpy scalars.
+        outDict = self.calib.toDict()
+        outDict['dataIdList'] = [{'exposure': np.int64(dataId['exposure']),
+                                  'detector': np.int64(dataId['detector']),
+                                  'filter': np.str_(dataId['filter'])}
+                                 for dataId in outDict['dataIdList']]
+
+        filename = tempfile.mktemp() + '.yaml'
+        with open(filename, 'w') as f:
+            yaml.dump(outDict, f)
+        with open(filename) as f:
+            self.assertIn('!!python/object/apply:numpy', f.read())
+
+        fromText = IsrProvenance.readText(filename)
+        self.assertEqual(fromText.dataIdList, self.calib.dataIdList)
+        self.assertIsInstance(fromText.dataIdList[0]['exposure'], np.int64)
+
+        # Other Python tags are still rejected.
+        with open(filename, 'w') as f:
+            f.write("!!python/object/apply:os.getcwd []\n")
+        with self.assertRaises(yaml.constructor.ConstructorError):
+            IsrProvenance.readText(filename)
+
+    def test_sharedYamlClassesUnchanged(self):
+        """Test that the numpy representers stay off PyYAML's classes.
+        """
+        for dumper in (yaml.SafeDumper, getattr(yaml, 'CSafeDumper', yaml.SafeDumper)):
+            self.assertNotIn(np.generic, dumper.yaml_multi_representers)
+            self.assertNotIn(np.ndarray, dumper.yaml_multi_representers)
+
 
 class MemoryTester(lsst.utils.tests.MemoryTestCase):
     pass
@@ -19,9 +19,11 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <https://www.gnu.org/licenses/>.
 
+import collections
 import unittest
 import itertools
 import tempfile
+import yaml
 
 import numpy as np
 
@@ -201,6 +203,50 @@ class CrosstalkTestCase(lsst.utils.tests.TestCase):
         outPath += '.yaml'
         calib.writeText(outPath)
 
+    def testReadLegacyYaml(self):
+        """Test reading YAML written with the default PyYAML dumper."""
+        calib = CrosstalkCalib()
+        calib.hasCrosstalk = True
+        calib.nAmp = self.numAmps
+        calib.coeffs = np.array(self.crosstalk)
+
+        # Metadata read from FITS or ECSV tables is an OrderedDict.
+        outDict = calib.toDict()
+        outDict['metadata'] = collections.OrderedDict(outDict['metadata'].toDict())
+
+        outPath = tempfile.mktemp() + '.yaml'
+        with open(outPath, 'w') as f:
+            yaml.dump(outDict, f)
+        with open(outPath) as f:
+            text = f.read()
+        self.assertIn('!!python/tuple', text)
+        self.assertIn('!!python/object/apply:collections.OrderedDict', text)
+
+        fromText = CrosstalkCalib.readText(outPath)
+        self.assertEqual(fromText.nAmp, self.numAmps)
+        np.testing.assert_array_equal(fromText.coeffs, calib.coeffs)
+        self.assertEqual(fromText.getMetadata()['NAMP'], self.numAmps)
+
+    def testFitsToYaml(self):
+        """Test writing a crosstalk calibration read from FITS as YAML."""
+        calib = CrosstalkCalib()
+        calib.hasCrosstalk = True
+        calib.nAmp = self.numAmps
+        calib.coeffs = np.array(self.crosstalk)
+
+        fitsPath = tempfile.mktemp() + '.fits'
+        calib.writeFits(fitsPath)
+        fromFits = CrosstalkCalib.readFits(fitsPath)
+        # Older astropy versions read the table metadata as an OrderedDict.
+        fromFits.setMetadata(collections.OrderedDict(fromFits.getMetadata()))
+
+        yamlPath = tempfile.mktemp() + '.yaml'
+        fromFits.writeText(yamlPath)
+        fromText = CrosstalkCalib.readText(yamlPath)
+        self.assertEqual(fromText.nAmp, self.numAmps)
+        np.testing.assert_array_equal(fromText.coeffs, calib.coeffs)
+        self.assertEqual(fromText.getMetadata()['NAMP'], self.numAmps)
+
     def testTaskAPI(self):
         """Test that the Tasks work
 
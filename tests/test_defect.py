@@ -91,6 +91,25 @@ class DefectTestCases(lsst.utils.tests.TestCase):
                 afwDisplay.utils.drawBBox(d.getBBox(), ctype=afwDisplay.CYAN, borderWidth=.5)
                 disp.incrDefaultFrame()
 
+    def testMaskDefect(self):
+        """Test that IsrTask.maskDefect matches Defects.maskPixels."""
+        defectList = measAlg.Defects()
+        for x0, y0, x1, y1 in [
+            (34, 0, 35, 80),
+            (34, 81, 34, 100),
+            (180, 100, 182, 130),
+            (240, 200, 260, 230),  # Extends past the image edge.
+        ]:
+            defectList.append(lsst.geom.Box2I(lsst.geom.Point2I(x0, y0), lsst.geom.Point2I(x1, y1)))
+
+        expected = afwImage.MaskedImageF(lsst.geom.Box2I(lsst.geom.Point2I(10, 20),
+                                                         lsst.geom.Extent2I(250, 225)))
+        defectList.maskPixels(expected, maskName="BAD")
+
+        exposure = afwImage.makeExposure(afwImage.MaskedImageF(expected.getBBox()))
+        ipIsr.IsrTask().maskDefect(exposure, defectList)
+        self.assertMasksEqual(exposure.getMask(), expected.getMask())
+
     def testDefectsFromMaskedImage(self):
         """Test creation of a DefectList from a MaskedImage."""
         mim = afwImage.MaskedImageF(10, 10)
@@ -24,6 +24,7 @@ import unittest
 import numpy as np
 
 import lsst.afw.image as afwImage
+import lsst.afw.math as afwMath
 import lsst.utils.tests
 import lsst.ip.isr as ipIsr
 import lsst.ip.isr.isrMock as isrMock
@@ -126,6 +127,18 @@ class IsrFunctionsCases(lsst.utils.tests.TestCase):
 
         self.assertEqual(len(defectList), 1)
 
+    def test_makeThresholdMaskBelowThreshold(self):
+        """Expect no defects or mask bits when nothing reaches the threshold.
+        """
+        threshold = self.mi.getImage().getArray().max() + 1.0
+        numSat = countMaskedPixels(self.mi, "SAT")
+        defectList = ipIsr.makeThresholdMask(self.mi, threshold,
+                                             growFootprints=2,
+                                             maskName='SAT')
+
+        self.assertEqual(len(defectList), 0)
+        self.assertEqual(countMaskedPixels(self.mi, "SAT"), numSat)
+
     def test_interpolateFromMask(self):
         """Expect number of interpolated pixels to be non-zero.
         """
@@ -238,6 +251,20 @@ class IsrFunctionsCases(lsst.utils.tests.TestCase):
         with self.assertRaises(RuntimeError):
             ipIsr.flatCorrection(self.mi, flatMi, "UNKNOWN", userScale=1.0, trimToFit=True)
 
+    def test_measureFlatScale(self):
+        """Expect the flat scale to follow the scaling type.
+        """
+        flatExp = isrMock.FlatMock().run()
+        flatMi = flatExp.getMaskedImage()
+
+        self.assertEqual(ipIsr.measureFlatScale(flatMi, 'USER', userScale=2.5), 2.5)
+        for scaling in ('MEAN', 'MEDIAN'):
+            statistic = afwMath.stringToStatisticsProperty(scaling)
+            self.assertEqual(ipIsr.measureFlatScale(flatMi, scaling),
+                             afwMath.makeStatistics(flatMi.image, statistic).getValue())
+        with self.assertRaises(RuntimeError):
+            ipIsr.measureFlatScale(flatMi, "UNKNOWN")
+
     def test_illumCorrection(self):
         """Expect larger median value after.
         Expect RuntimeError if sizes are different.
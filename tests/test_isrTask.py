@@ -186,6 +186,19 @@ class IsrTaskTestCases(lsst.utils.tests.TestCase):
         self.assertFloatsAlmostEqual(statAfter[1], 147407.02, atol=1e-2)
         self.assertFloatsAlmostEqual(statBefore[1], 147.55304, atol=1e-2)
 
+    def test_flatCorrectionMeasuredScale(self):
+        """Expect a premeasured flat scale to match the configured scaling.
+        """
+        flatIm = isrMock.FlatMock().run()
+        self.config.flatScalingType = 'MEAN'
+
+        expected = self.inputExp.clone()
+        self.task.flatCorrection(expected, flatIm)
+
+        flatScale = self.task.measureFlatScale(flatIm)
+        self.task.flatCorrection(self.inputExp, flatIm, flatScale=flatScale)
+        self.assertMaskedImagesEqual(self.inputExp.getMaskedImage(), expected.getMaskedImage())
+
     def test_saturationDetection(self):
         """Expect the saturation level detection/masking to scale with
         threshold.
@@ -28,14 +28,65 @@ import lsst.geom
 import lsst.afw.image as afwImage
 import lsst.ip.isr as ipIsr
 
+# Full, data and overscan boxes for an overscan along y or x.
+_FULL_BBOX_Y = lsst.geom.Box2I(lsst.geom.Point2I(0, 0), lsst.geom.Point2I(9, 12))
+_FULL_BBOX_X = lsst.geom.Box2I(lsst.geom.Point2I(0, 0), lsst.geom.Point2I(12, 9))
+_DATA_BBOX = lsst.geom.Box2I(lsst.geom.Point2I(0, 0), lsst.geom.Extent2I(10, 10))
+_OVERSCAN_BBOX_Y = lsst.geom.Box2I(lsst.geom.Point2I(0, 10), lsst.geom.Point2I(9, 12))
+_OVERSCAN_BBOX_X = lsst.geom.Box2I(lsst.geom.Point2I(10, 0), lsst.geom.Point2I(12, 9))
+
+# Expected images after correcting a 10x10 data region of 10 with a
+# 3 pixel overscan along y (13 rows) or x (13 columns).
+_EXPECTED_Y = np.full((13, 10), 8, dtype=np.float32)
+_EXPECTED_Y[10:, :] = 0
+_EXPECTED_X = np.ascontiguousarray(_EXPECTED_Y.T)
+
+# As above, but with an overscan ramp of 2 + row and -0.5/0/0.5
+# offsets across the overscan.
+_EXPECTED_POLY_Y = np.empty((13, 10), dtype=np.float32)
+_EXPECTED_POLY_Y[:10, :] = (10 - 2 - np.arange(10))[np.newaxis, :]
+_EXPECTED_POLY_Y[10:, :] = np.array([-0.5, 0, 0.5])[:, np.newaxis]
+_EXPECTED_POLY_X = np.ascontiguousarray(_EXPECTED_POLY_Y.T)
 
-class IsrTestCases(lsst.utils.tests.TestCase):
 
-    def setUp(self):
-        self.overscanKeyword = "BIASSEC"
+class IsrTestCases(lsst.utils.tests.TestCase):
 
-    def tearDown(self):
-        del self.overscanKeyword
+    @classmethod
+    def setUpClass(cls):
+        # Pristine images for each test geometry; the checks work on
+        # deep copies so they do not rebuild and refill them every time.
+        cls._templateY = cls.makeTemplate(_FULL_BBOX_Y, _OVERSCAN_BBOX_Y)
+        cls._templateX = cls.makeTemplate(_FULL_BBOX_X, _OVERSCAN_BBOX_X)
+
+        cls._templatePolyX = afwImage.MaskedImageF(cls._templateX, deep=True)
+        overscan = afwImage.MaskedImageF(cls._templatePolyX, _OVERSCAN_BBOX_X)
+        overscan.image.array[:, :] = (2 + np.arange(_OVERSCAN_BBOX_X.getHeight())[:, np.newaxis]
+                                      + np.array([-0.5, 0.0, 0.5])[np.newaxis, :])
+
+        cls._templatePolyY = afwImage.MaskedImageF(cls._templateY, deep=True)
+        overscan = afwImage.MaskedImageF(cls._templatePolyY, _OVERSCAN_BBOX_Y)
+        overscan.image.array[:, :] = (2 + np.arange(_OVERSCAN_BBOX_Y.getWidth())[np.newaxis, :]
+                                      + np.array([-0.5, 0.0, 0.5])[:, np.newaxis])
+
+    @classmethod
+    def tearDownClass(cls):
+        del cls._templateY
+        del cls._templateX
+        del cls._templatePolyX
+        del cls._templatePolyY
+
+    @staticmethod
+    def makeTemplate(bbox, overscanBBox):
+        """Make an image of 10 with an overscan region of 2.
+        """
+        maskedImage = afwImage.MaskedImageF(bbox)
+        image = maskedImage.image.array
+        image[:, :] = 10
+        image[overscanBBox.getMinY() - bbox.getMinY():overscanBBox.getMaxY() + 1 - bbox.getMinY(),
+              overscanBBox.getMinX() - bbox.getMinX():overscanBBox.getMaxX() + 1 - bbox.getMinX()] = 2
+        maskedImage.mask.array[:, :] = 0x0
+        maskedImage.variance.array[:, :] = 1
+        return maskedImage
 
     def updateConfigFromKwargs(self, config, **kwargs):
         """Common config from keywords.
@@ -49,23 +100,10 @@ class IsrTestCases(lsst.utils.tests.TestCase):
             config.overscan.order = order
 
     def checkOverscanCorrectionY(self, **kwargs):
-        bbox = lsst.geom.Box2I(lsst.geom.Point2I(0, 0),
-                               lsst.geom.Point2I(9, 12))
-        maskedImage = afwImage.MaskedImageF(bbox)
-        maskedImage.set(10, 0x0, 1)
+        maskedImage = afwImage.MaskedImageF(self._templateY, deep=True)
 
-        dataBox = lsst.geom.Box2I(lsst.geom.Point2I(0, 0), lsst.geom.Extent2I(10, 10))
-        dataImage = afwImage.MaskedImageF(maskedImage, dataBox)
-
-        # these should be functionally equivalent
-        bbox = lsst.geom.Box2I(lsst.geom.Point2I(0, 10),
-                               lsst.geom.Point2I(9, 12))
-        biassec = '[1:10,11:13]'
-        overscan = afwImage.MaskedImageF(maskedImage, bbox)
-        overscan.set(2, 0x0, 1)
-        exposure = afwImage.ExposureF(maskedImage, None)
-        metadata = exposure.getMetadata()
-        metadata.setString(self.overscanKeyword, biassec)
+        dataImage = afwImage.MaskedImageF(maskedImage, _DATA_BBOX)
+        overscan = afwImage.MaskedImageF(maskedImage, _OVERSCAN_BBOX_Y)
 
         config = ipIsr.IsrTask.ConfigClass()
         self.updateConfigFromKwargs(config, **kwargs)
@@ -73,34 +111,13 @@ class IsrTestCases(lsst.utils.tests.TestCase):
         isrTask = ipIsr.IsrTask(config=config)
         isrTask.overscan.run(dataImage.getImage(), overscan.getImage())
 
-        height = maskedImage.getHeight()
-        width = maskedImage.getWidth()
-        for j in range(height):
-            for i in range(width):
-                if j >= 10:
-                    self.assertEqual(maskedImage.image[i, j, afwImage.LOCAL], 0)
-                else:
-                    self.assertEqual(maskedImage.image[i, j, afwImage.LOCAL], 8)
+        np.testing.assert_array_equal(maskedImage.image.array, _EXPECTED_Y)
 
     def checkOverscanCorrectionX(self, **kwargs):
-        bbox = lsst.geom.Box2I(lsst.geom.Point2I(0, 0),
-                               lsst.geom.Point2I(12, 9))
-        maskedImage = afwImage.MaskedImageF(bbox)
-        maskedImage.set(10, 0x0, 1)
-
-        dataBox = lsst.geom.Box2I(lsst.geom.Point2I(0, 0), lsst.geom.Extent2I(10, 10))
-        dataImage = afwImage.MaskedImageF(maskedImage, dataBox)
-
-        # these should be functionally equivalent
-        bbox = lsst.geom.Box2I(lsst.geom.Point2I(10, 0),
-                               lsst.geom.Point2I(12, 9))
-        biassec = '[11:13,1:10]'
-        overscan = afwImage.MaskedImageF(maskedImage, bbox)
-        overscan.set(2, 0x0, 1)
+        maskedImage = afwImage.MaskedImageF(self._templateX, deep=True)
 
-        exposure = afwImage.ExposureF(maskedImage, None)
-        metadata = exposure.getMetadata()
-        metadata.setString(self.overscanKeyword, biassec)
+        dataImage = afwImage.MaskedImageF(maskedImage, _DATA_BBOX)
+        overscan = afwImage.MaskedImageF(maskedImage, _OVERSCAN_BBOX_X)
 
         config = ipIsr.IsrTask.ConfigClass()
         self.updateConfigFromKwargs(config, **kwargs)
@@ -108,14 +125,7 @@ class IsrTestCases(lsst.utils.tests.TestCase):
         isrTask = ipIsr.IsrTask(config=config)
         isrTask.overscan.run(dataImage, overscan.getImage())
 
-        height = maskedImage.getHeight()
-        width = maskedImage.getWidth()
-        for j in range(height):
-            for i in range(width):
-                if i >= 10:
-                    self.assertEqual(maskedImage.image[i, j, afwImage.LOCAL], 0)
-                else:
-                    self.assertEqual(maskedImage.image[i, j, afwImage.LOCAL], 8)
+        np.testing.assert_array_equal(maskedImage.image.array, _EXPECTED_X)
 
     def checkOverscanCorrectionSineWave(self, **kwargs):
         """vertical sine wave along long direction"""
@@ -128,7 +138,6 @@ class IsrTestCases(lsst.utils.tests.TestCase):
         bbox = lsst.geom.Box2I(lsst.geom.Point2I(0, 0),
                                lsst.geom.Point2I(shortAxis-1, longAxis-1))
         maskedImage = afwImage.MaskedImageF(bbox)
-        maskedImage.set(50.0, 0x0, 1)
 
         # vertical sine wave along long direction
         x = np.linspace(0, 2*3.14159, longAxis)
@@ -137,60 +146,55 @@ class IsrTestCases(lsst.utils.tests.TestCase):
         sineWave = sineWave.astype(int)
 
         fullImage = np.repeat(sineWave, shortAxis).reshape((longAxis, shortAxis))
-        maskedImage.image.array += fullImage
+        maskedImage.image.array[:, :] = 50.0 + fullImage
+        maskedImage.mask.array[:, :] = 0x0
+        maskedImage.variance.array[:, :] = 1
 
         # data part of the full image: (500,70)
         dataBox = lsst.geom.Box2I(lsst.geom.Point2I(0, 0), lsst.geom.Extent2I(shortAxis-overscanWidth,
                                   longAxis))
         dataImage = afwImage.MaskedImageF(maskedImage, dataBox)
-        # these should be functionally equivalent
         bbox = lsst.geom.Box2I(lsst.geom.Point2I(shortAxis-overscanWidth, 0),
                                lsst.geom.Point2I(shortAxis-1, longAxis-1))
-        biassec = '[1:500,71:100]'
         overscan = afwImage.MaskedImageF(maskedImage, bbox)
         overscan.image.array -= 50.0  # subtract initial pedestal
 
-        exposure = afwImage.ExposureF(maskedImage, None)
-        metadata = exposure.getMetadata()
-        metadata.setString(self.overscanKeyword, biassec)
-
         ipIsr.overscanCorrection(dataImage, overscan.getImage(), **kwargs)
 
-        height = maskedImage.getHeight()
-        width = maskedImage.getWidth()
-
-        for j in range(height):
-            for i in range(width):
-                if i >= 70:
-                    self.assertEqual(maskedImage.image[i, j, afwImage.LOCAL], 0.0)
-                else:
-                    self.assertEqual(maskedImage.image[i, j, afwImage.LOCAL], 50.0)
+        expected = np.full((maskedImage.getHeight(), maskedImage.getWidth()), 50.0, dtype=np.float32)
+        expected[:, 70:] = 0.0
+        np.testing.assert_array_equal(maskedImage.image.array, expected)
 
     def test_MedianPerRowOverscanCorrection(self):
         self.checkOverscanCorrectionY(fitType="MEDIAN_PER_ROW")
         self.checkOverscanCorrectionY(fitType="MEDIAN_PER_ROW")
         self.checkOverscanCorrectionSineWave(fitType="MEDIAN_PER_ROW")
 
-    def test_MedianOverscanCorrection(self):
-        self.checkOverscanCorrectionY(fitType="MEDIAN")
-        self.checkOverscanCorrectionX(fitType="MEDIAN")
+    def test_ConstantOverscanCorrection(self):
+        for fitType in ("MEDIAN", "MEAN"):
+            with self.subTest(fitType=fitType):
+                self.checkOverscanCorrectionY(fitType=fitType)
+                self.checkOverscanCorrectionX(fitType=fitType)
+
+    def test_MeanOverscanMasking(self):
+        """Masked and NaN pixels must not contribute to the mean."""
+        overscan = afwImage.MaskedImageF(lsst.geom.Extent2I(3, 10))
+        overscan.set(2, 0x0, 1)
+        overscan.image.array[0, 0] = 1000.0
+        overscan.mask.array[0, 0] = overscan.mask.getPlaneBitMask("SAT")
+        overscan.image.array[1, 1] = np.nan
+
+        config = ipIsr.OverscanCorrectionTaskConfig()
+        config.fitType = "MEAN"
+        overscanTask = ipIsr.OverscanCorrectionTask(config=config)
+        result = overscanTask.measureConstantOverscan(overscan)
+        self.assertEqual(result.overscanValue, 2.0)
 
     def checkPolyOverscanCorrectionX(self, **kwargs):
-        bbox = lsst.geom.Box2I(lsst.geom.Point2I(0, 0),
-                               lsst.geom.Point2I(12, 9))
-        maskedImage = afwImage.MaskedImageF(bbox)
-        maskedImage.set(10, 0x0, 1)
+        maskedImage = afwImage.MaskedImageF(self._templatePolyX, deep=True)
 
-        dataBox = lsst.geom.Box2I(lsst.geom.Point2I(0, 0), lsst.geom.Extent2I(10, 10))
-        dataImage = afwImage.MaskedImageF(maskedImage, dataBox)
-        # these should be functionally equivalent
-        bbox = lsst.geom.Box2I(lsst.geom.Point2I(10, 0),
-                               lsst.geom.Point2I(12, 9))
-        overscan = afwImage.MaskedImageF(maskedImage, bbox)
-        overscan.set(2, 0x0, 1)
-        for i in range(bbox.getDimensions()[1]):
-            for j, off in enumerate([-0.5, 0.0, 0.5]):
-                overscan.image[j, i, afwImage.LOCAL] = 2+i+off
+        dataImage = afwImage.MaskedImageF(maskedImage, _DATA_BBOX)
+        overscan = afwImage.MaskedImageF(maskedImage, _OVERSCAN_BBOX_X)
 
         config = ipIsr.IsrTask.ConfigClass()
         self.updateConfigFromKwargs(config, **kwargs)
@@ -198,36 +202,13 @@ class IsrTestCases(lsst.utils.tests.TestCase):
         isrTask = ipIsr.IsrTask(config=config)
         isrTask.overscan.run(dataImage, overscan.getImage())
 
-        height = maskedImage.getHeight()
-        width = maskedImage.getWidth()
-        for j in range(height):
-            for i in range(width):
-                if i == 10:
-                    self.assertEqual(maskedImage.image[i, j, afwImage.LOCAL], -0.5)
-                elif i == 11:
-                    self.assertEqual(maskedImage.image[i, j, afwImage.LOCAL], 0)
-                elif i == 12:
-                    self.assertEqual(maskedImage.image[i, j, afwImage.LOCAL], 0.5)
-                else:
-                    self.assertEqual(maskedImage.image[i, j, afwImage.LOCAL], 10 - 2 - j)
+        np.testing.assert_array_equal(maskedImage.image.array, _EXPECTED_POLY_X)
 
     def checkPolyOverscanCorrectionY(self, **kwargs):
-        bbox = lsst.geom.Box2I(lsst.geom.Point2I(0, 0),
-                               lsst.geom.Point2I(9, 12))
-        maskedImage = afwImage.MaskedImageF(bbox)
-        maskedImage.set(10, 0x0, 1)
+        maskedImage = afwImage.MaskedImageF(self._templatePolyY, deep=True)
 
-        dataBox = lsst.geom.Box2I(lsst.geom.Point2I(0, 0), lsst.geom.Extent2I(10, 10))
-        dataImage = afwImage.MaskedImageF(maskedImage, dataBox)
-
-        # these should be functionally equivalent
-        bbox = lsst.geom.Box2I(lsst.geom.Point2I(0, 10),
-                               lsst.geom.Point2I(9, 12))
-        overscan = afwImage.MaskedImageF(maskedImage, bbox)
-        overscan.set(2, 0x0, 1)
-        for i in range(bbox.getDimensions()[0]):
-            for j, off in enumerate([-0.5, 0.0, 0.5]):
-                overscan.image[i, j, afwImage.LOCAL] = 2+i+off
+        dataImage = afwImage.MaskedImageF(maskedImage, _DATA_BBOX)
+        overscan = afwImage.MaskedImageF(maskedImage, _OVERSCAN_BBOX_Y)
 
         config = ipIsr.IsrTask.ConfigClass()
         self.updateConfigFromKwargs(config, **kwargs)
@@ -235,28 +216,19 @@ class IsrTestCases(lsst.utils.tests.TestCase):
         isrTask = ipIsr.IsrTask(config=config)
         isrTask.overscan.run(dataImage, overscan.getImage())
 
-        height = maskedImage.getHeight()
-        width = maskedImage.getWidth()
-        for j in range(height):
-            for i in range(width):
-                if j == 10:
-                    self.assertEqual(maskedImage.image[i, j, afwImage.LOCAL], -0.5)
-                elif j == 11:
-                    self.assertEqual(maskedImage.image[i, j, afwImage.LOCAL], 0)
-                elif j == 12:
-                    self.assertEqual(maskedImage.image[i, j, afwImage.LOCAL], 0.5)
-                else:
-                    self.assertEqual(maskedImage.image[i, j, afwImage.LOCAL], 10 - 2 - i)
+        np.testing.assert_array_equal(maskedImage.image.array, _EXPECTED_POLY_Y)
 
     def testPolyOverscanCorrection(self):
         for fitType in ("POLY", "CHEB", "LEG"):
-            self.checkPolyOverscanCorrectionX(fitType=fitType)
-            self.checkPolyOverscanCorrectionY(fitType=fitType)
+            with self.subTest(fitType=fitType):
+                self.checkPolyOverscanCorrectionX(fitType=fitType)
+                self.checkPolyOverscanCorrectionY(fitType=fitType)
 
     def testSplineOverscanCorrection(self):
         for fitType in ("NATURAL_SPLINE", "CUBIC_SPLINE", "AKIMA_SPLINE"):
-            self.checkPolyOverscanCorrectionX(fitType=fitType, order=5)
-            self.checkPolyOverscanCorrectionY(fitType=fitType, order=5)
+            with self.subTest(fitType=fitType):
+                self.checkPolyOverscanCorrectionX(fitType=fitType, order=5)
+                self.checkPolyOverscanCorrectionY(fitType=fitType, order=5)
 
 
 class MemoryTester(lsst.utils.tests.MemoryTestCase):